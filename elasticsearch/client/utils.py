@@ -17,14 +17,21 @@
 
 
 import base64
+import linecache
+import string
 import weakref
 from datetime import date, datetime
-from functools import wraps
+from functools import lru_cache, wraps
 
-from ..compat import quote, string_types, to_bytes, to_str, unquote, urlparse
+from ..compat import quote_from_bytes, string_types, to_bytes, to_str, unquote, urlparse
 
 # parts of URL to be omitted
 SKIP_IN_PATH = (None, "", b"", [], ())
+# types whose empty values are in SKIP_IN_PATH
+_SKIP_EMPTY_IN_PATH = (str, bytes, list, tuple)
+
+# bytes which never need to be quoted within a part of the URL path
+_SAFE_PATH_BYTES = (string.ascii_letters + string.digits + "-._~,*").encode("ascii")
 
 
 def _normalize_hosts(hosts):
@@ -38,38 +45,63 @@ def _normalize_hosts(hosts):
 
     # passed in just one string
     if isinstance(hosts, string_types):
-        hosts = [hosts]
+        return [_normalize_host(hosts)]
 
-    out = []
     # normalize hosts to dicts
-    for host in hosts:
-        if isinstance(host, string_types):
-            if "://" not in host:
-                host = f"//{host}"
+    return [_normalize_host(host) for host in hosts]
 
-            parsed_url = urlparse(host)
-            h = {"host": parsed_url.hostname}
 
-            if parsed_url.port:
-                h["port"] = parsed_url.port
+def _normalize_host(host):
+    """
+    Transform a single host string to a dict, anything else is returned as is.
+    """
+    if not isinstance(host, string_types):
+        return host
 
-            if parsed_url.scheme == "https":
-                h["port"] = parsed_url.port or 443
-                h["use_ssl"] = True
+    h = _parse_host_port(host)
+    if h is not None:
+        return h
 
-            if parsed_url.username or parsed_url.password:
-                h["http_auth"] = "{}:{}".format(
-                    unquote(parsed_url.username),
-                    unquote(parsed_url.password),
-                )
+    if "://" not in host:
+        host = f"//{host}"
 
-            if parsed_url.path and parsed_url.path != "/":
-                h["url_prefix"] = parsed_url.path
+    parsed_url = urlparse(host)
+    h = {"host": parsed_url.hostname}
 
-            out.append(h)
-        else:
-            out.append(host)
-    return out
+    if parsed_url.port:
+        h["port"] = parsed_url.port
+
+    if parsed_url.scheme == "https":
+        h["port"] = parsed_url.port or 443
+        h["use_ssl"] = True
+
+    if parsed_url.username or parsed_url.password:
+        h["http_auth"] = "{}:{}".format(
+            unquote(parsed_url.username),
+            unquote(parsed_url.password),
+        )
+
+    if parsed_url.path and parsed_url.path != "/":
+        h["url_prefix"] = parsed_url.path
+
+    return h
+
+
+def _parse_host_port(host):
+    """
+    Fast path for the common ``host:port`` form of a host string, returns
+    ``None`` for anything that needs to go through ``urlparse``.
+    """
+    if "://" in host or "@" in host or "/" in host or "[" in host:
+        return None
+    hostname, sep, port = host.partition(":")
+    # only plain ASCII digits in the port, no second ':' (IPv6) etc.
+    if not hostname or not sep or not port or port.strip(string.digits):
+        return None
+    port = int(port)
+    if not 0 < port <= 65535 or "?" in hostname or "#" in hostname:
+        return None
+    return {"host": hostname.lower(), "port": port}
 
 
 def _escape(value):
@@ -77,6 +109,21 @@ def _escape(value):
     Escape a single value of a URL string or a query parameter. If it is a list
     or tuple, turn it into a comma-separated string first.
     """
+    # make bools into true/false strings, they are singletons so an
+    # identity check is all that's needed
+    if value is True:
+        return b"true"
+    elif value is False:
+        return b"false"
+
+    # fast path for the most common types of values
+    value_type = type(value)
+    if value_type is str:
+        return value.encode("utf-8")
+    elif value_type is int:
+        return b"%d" % value
+    elif value_type is bytes:
+        return value
 
     # make sequences into comma-separated stings
     if isinstance(value, (list, tuple)):
@@ -86,10 +133,6 @@ def _escape(value):
     elif isinstance(value, (date, datetime)):
         value = value.isoformat()
 
-    # make bools into true/false strings
-    elif isinstance(value, bool):
-        value = str(value).lower()
-
     # don't decode bytestrings
     elif isinstance(value, bytes):
         return value
@@ -106,69 +149,151 @@ def _make_path(*parts):
     Convert lists and tuples to comma separated values.
     """
     # TODO: maybe only allow some parts to be lists/tuples ?
-    return "/" + "/".join(
+    path = []
+    for p in parts:
+        if p is None:
+            continue
+        elif isinstance(p, _SKIP_EMPTY_IN_PATH) and not p:
+            continue
+        p = _escape(p)
+        # only quote parts that contain characters which aren't URL safe,
         # preserve ',' and '*' in url for nicer URLs in logs
-        quote(_escape(p), b",*")
-        for p in parts
-        if p not in SKIP_IN_PATH
-    )
+        if p.translate(None, _SAFE_PATH_BYTES):
+            p = quote_from_bytes(p, b",*").encode("ascii")
+        path.append(p)
+    return (b"/" + b"/".join(path)).decode("ascii")
 
 
 # parameters that apply to all methods
 GLOBAL_PARAMS = ("pretty", "human", "error_trace", "format", "filter_path")
 
 
+# source template for the wrapper generated by ``query_params``, the
+# per-parameter blocks are unrolled into ``{param_blocks}`` so that no
+# generic loop over the accepted parameters runs on each API call.
+# The template is only a string to black, flake8 and mypy so none of them
+# check it, any change to it needs to be covered by the query_params tests.
+_QUERY_PARAMS_TEMPLATE = """\
+def _make_wrapped(func):
+    def _wrapped(*args, **kwargs):
+        # API methods may modify params and headers so always pass new dicts
+        if not kwargs:
+            return func(*args, params={{}}, headers={{}})
+
+        params = {{}}
+        headers = {{}}
+        _params = kwargs.pop("params", None)
+        if _params:
+            params = _params.copy()
+        _headers = kwargs.pop("headers", None)
+        if _headers:
+            headers = {{k.lower(): v for k, v in _headers.items()}}
+
+        if "opaque_id" in kwargs:
+            headers["x-opaque-id"] = kwargs.pop("opaque_id")
+
+        http_auth = kwargs.pop("http_auth") if "http_auth" in kwargs else None
+        api_key = kwargs.pop("api_key") if "api_key" in kwargs else None
+
+        if http_auth is not None and api_key is not None:
+            raise ValueError(
+                "Only one of 'http_auth' and 'api_key' may be passed at a time"
+            )
+        elif http_auth is not None:
+            headers["authorization"] = _auth_header("Basic", http_auth)
+        elif api_key is not None:
+            headers["authorization"] = _auth_header("ApiKey", api_key)
+
+        # with only a few kwargs left it's cheaper to look each of them up in
+        # the accepted parameters than to check every accepted parameter,
+        # params are still added in declaration order to keep URLs stable
+        if len(kwargs) <= 4:
+            found = [p for p in kwargs if p in _all_params_order]
+            if len(found) > 1:
+                found.sort(key=_all_params_order.__getitem__)
+            for p in found:
+                v = kwargs.pop(p)
+                if v is not None:
+                    params[p] = _escape(v)
+        else:
+{param_blocks}
+        # don't treat ignore, request_timeout, and opaque_id as other params to avoid escaping
+        if "ignore" in kwargs:
+            params["ignore"] = kwargs.pop("ignore")
+        if "request_timeout" in kwargs:
+            params["request_timeout"] = kwargs.pop("request_timeout")
+        return func(*args, params=params, headers=headers, **kwargs)
+
+    return _wrapped
+"""
+
+_QUERY_PARAM_BLOCK = """\
+            if {param!r} in kwargs:
+                v = kwargs.pop({param!r})
+                if v is not None:
+                    params[{param!r}] = _escape(v)
+"""
+
+# compiled wrapper factories keyed by the accepted parameters, many API
+# methods share the same parameters so each source is only compiled once.
+_QUERY_PARAMS_FACTORIES = {}
+
+
+def _query_params_factory(all_params):
+    factory = _QUERY_PARAMS_FACTORIES.get(all_params)
+    if factory is None:
+        src = _QUERY_PARAMS_TEMPLATE.format(
+            param_blocks="".join(_QUERY_PARAM_BLOCK.format(param=p) for p in all_params)
+        )
+        namespace = {
+            "_escape": _escape,
+            "_auth_header": _auth_header,
+            "_all_params_order": {p: i for i, p in enumerate(all_params)},
+        }
+        # register the source under a name per parameter set so tracebacks
+        # through the generated wrapper show its lines
+        filename = "<query_params-%d from %s._QUERY_PARAMS_TEMPLATE>" % (
+            len(_QUERY_PARAMS_FACTORIES),
+            __name__,
+        )
+        linecache.cache[filename] = (len(src), None, src.splitlines(True), filename)
+        exec(compile(src, filename, "exec"), namespace)
+        factory = _QUERY_PARAMS_FACTORIES[all_params] = namespace["_make_wrapped"]
+    return factory
+
+
 def query_params(*es_query_params):
     """
     Decorator that pops all accepted parameters from method's kwargs and puts
     them in the params argument.
     """
 
+    # built once per decorated method rather than on every call
+    all_params = es_query_params + GLOBAL_PARAMS
+
     def _wrapper(func):
-        @wraps(func)
-        def _wrapped(*args, **kwargs):
-            params = (kwargs.pop("params", None) or {}).copy()
-            headers = {
-                k.lower(): v
-                for k, v in (kwargs.pop("headers", None) or {}).copy().items()
-            }
-
-            if "opaque_id" in kwargs:
-                headers["x-opaque-id"] = kwargs.pop("opaque_id")
-
-            http_auth = kwargs.pop("http_auth", None)
-            api_key = kwargs.pop("api_key", None)
-
-            if http_auth is not None and api_key is not None:
-                raise ValueError(
-                    "Only one of 'http_auth' and 'api_key' may be passed at a time"
-                )
-            elif http_auth is not None:
-                headers["authorization"] = f"Basic {_base64_auth_header(http_auth)}"
-            elif api_key is not None:
-                headers["authorization"] = f"ApiKey {_base64_auth_header(api_key)}"
-
-            for p in es_query_params + GLOBAL_PARAMS:
-                if p in kwargs:
-                    v = kwargs.pop(p)
-                    if v is not None:
-                        params[p] = _escape(v)
-
-            # don't treat ignore, request_timeout, and opaque_id as other params to avoid escaping
-            for p in ("ignore", "request_timeout"):
-                if p in kwargs:
-                    params[p] = kwargs.pop(p)
-            return func(*args, params=params, headers=headers, **kwargs)
-
-        return _wrapped
+        return wraps(func)(_query_params_factory(all_params)(func))
 
     return _wrapper
 
 
 def _bulk_body(serializer, body):
-    # if not passed in a string, serialize items and join by newline
+    # if not passed in a string, serialize items into a single buffer
+    # joined by newlines
     if not isinstance(body, string_types):
-        body = "\n".join(map(serializer.dumps, body))
+        buf = bytearray()
+        for item in body:
+            item = serializer.dumps(item)
+            if isinstance(item, str):
+                item = item.encode("utf-8", "surrogatepass")
+            if buf:
+                buf += b"\n"
+            buf += item
+        # only add the final newline if the last item didn't end with one,
+        # an empty body is just the newline
+        if not buf.endswith(b"\n"):
+            buf += b"\n"
+        return bytes(buf)
 
     # bulk body must end with a newline
     if isinstance(body, bytes):
@@ -190,6 +315,28 @@ def _base64_auth_header(auth_value):
     return to_str(auth_value)
 
 
+def _auth_header(scheme, auth_value):
+    """Takes the authorization scheme and either a 2-tuple or
+    a base64-encoded string and returns the complete value
+    of the HTTP authorization header.
+    """
+    # already encoded values have nothing worth caching
+    if not isinstance(auth_value, (list, tuple)):
+        return scheme + " " + to_str(auth_value)
+    return _cached_auth_header(scheme, tuple(auth_value))
+
+
+@lru_cache(maxsize=64)
+def _cached_auth_header(scheme, auth_value):
+    """Encodes a 2-tuple of credentials into the authorization header value.
+
+    The cache keeps the last 64 distinct plaintext credentials in memory for
+    the life of the process. Call ``_cached_auth_header.cache_clear()`` to
+    drop them, for example after rotating credentials.
+    """
+    return scheme + " " + _base64_auth_header(auth_value)
+
+
 class NamespacedClient:
     def __init__(self, client):
         self.client = client
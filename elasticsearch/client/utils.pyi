@@ -47,7 +47,7 @@ def query_params(
 ) -> Callable[[Callable[..., T]], Callable[..., T]]: ...
 def _bulk_body(
     serializer: Serializer, body: Union[str, bytes, Collection[Any]]
-) -> str: ...
+) -> Union[str, bytes]: ...
 
 class NamespacedClient:
     client: Elasticsearch
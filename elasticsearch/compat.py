@@ -16,7 +16,14 @@
 #  under the License.
 
 from queue import Queue
-from urllib.parse import quote, quote_plus, unquote, urlencode, urlparse
+from urllib.parse import (
+    quote,
+    quote_from_bytes,
+    quote_plus,
+    unquote,
+    urlencode,
+    urlparse,
+)
 
 string_types = str, bytes
 
@@ -54,6 +61,7 @@ __all__ = [
     "reraise_exceptions",
     "quote_plus",
     "quote",
+    "quote_from_bytes",
     "urlencode",
     "unquote",
     "urlparse",
@@ -25,6 +25,7 @@ reraise_exceptions: Tuple[Type[Exception], ...]
 
 from queue import Queue as Queue
 from urllib.parse import quote as quote
+from urllib.parse import quote_from_bytes as quote_from_bytes
 from urllib.parse import quote_plus as quote_plus
 from urllib.parse import unquote as unquote
 from urllib.parse import urlencode as urlencode
@@ -86,11 +86,23 @@ class TransportError(ElasticsearchException):
         return self.args[2]
 
     def __str__(self):
+        # the rendered string is cached as exceptions are often logged and
+        # formatted more than once
+        s = self.__dict__.get("_str")
+        if s is not None:
+            return s
+
         cause = ""
-        try:
-            if self.info and "error" in self.info:
-                if isinstance(self.info["error"], dict):
-                    root_cause = self.info["error"]["root_cause"][0]
+        # info is optional, e.g. TransportError("N/A", "Unable to sniff hosts.")
+        info = self.args[2] if len(self.args) > 2 else None
+        if isinstance(info, dict):
+            error = info.get("error")
+            if isinstance(error, dict):
+                root_causes = error.get("root_cause")
+                root_cause = None
+                if isinstance(root_causes, list) and root_causes:
+                    root_cause = root_causes[0]
+                if isinstance(root_cause, dict) and "reason" in root_cause:
                     cause = ", ".join(
                         filter(
                             None,
@@ -102,12 +114,13 @@ class TransportError(ElasticsearchException):
                         )
                     )
 
-                else:
-                    cause = repr(self.info["error"])
-        except LookupError:
-            pass
-        msg = ", ".join(filter(None, [str(self.status_code), repr(self.error), cause]))
-        return f"{self.__class__.__name__}({msg})"
+            elif "error" in info:
+                cause = repr(error)
+
+        s = self.__class__.__name__ + "(" + str(self.status_code) + ", "
+        s += repr(self.error) + (", " + cause if cause else "") + ")"
+        self._str = s
+        return s
 
 
 class ConnectionError(TransportError):
@@ -118,11 +131,14 @@ class ConnectionError(TransportError):
     """
 
     def __str__(self):
-        return "ConnectionError({}) caused by: {}({})".format(
-            self.error,
-            self.info.__class__.__name__,
-            self.info,
-        )
+        s = self.__dict__.get("_str")
+        if s is None:
+            s = self._str = "ConnectionError({}) caused by: {}({})".format(
+                self.error,
+                self.info.__class__.__name__,
+                self.info,
+            )
+        return s
 
 
 class SSLError(ConnectionError):
@@ -32,6 +32,14 @@ from .exceptions import (
 from .serializer import DEFAULT_SERIALIZERS, Deserializer, JSONSerializer
 from .utils import _client_meta_version
 
+# Default metadata for the x-elastic-client-meta HTTP header. Only requires
+# adding the (service, service_version) tuple to the beginning of the client_meta
+_CLIENT_META = (
+    ("es", _client_meta_version(__versionstr__)),
+    ("py", _client_meta_version(python_version())),
+    ("t", _client_meta_version(__versionstr__)),
+)
+
 
 def get_host_info(node_info, host):
     """
@@ -185,14 +193,9 @@ class Transport:
         if sniff_on_start:
             self.sniff_hosts(True)
 
-        # Create the default metadata for the x-elastic-client-meta
-        # HTTP header. Only requires adding the (service, service_version)
-        # tuple to the beginning of the client_meta
-        self._client_meta = (
-            ("es", _client_meta_version(__versionstr__)),
-            ("py", _client_meta_version(python_version())),
-            ("t", _client_meta_version(__versionstr__)),
-        )
+        # Start from the default metadata for the x-elastic-client-meta
+        # HTTP header, it's the same for every Transport in the process.
+        self._client_meta = _CLIENT_META
 
         # Grab the 'HTTP_CLIENT_META' property from the connection class
         http_client_meta = getattr(connection_class, "HTTP_CLIENT_META", None)
@@ -35,6 +35,16 @@ class TestNormalizeHosts:
             {"host": "elastic.co", "http_auth": "user:secre]"},
         ] == _normalize_hosts(["elastic.co:42", "user:secre%5D@elastic.co"])
 
+    def test_host_port_strings_match_urlparse(self):
+        assert [
+            {"host": "elastic.co", "port": 9200},
+            {"host": "localhost", "port": 9200},
+            {"host": "elastic.co"},
+            {"host": "::1", "port": 9200},
+        ] == _normalize_hosts(
+            ["Elastic.co:9200", "localhost:9200", "elastic.co:0", "[::1]:9200"]
+        )
+
     def test_strings_are_parsed_for_scheme(self):
         assert [
             {"host": "elastic.co", "port": 42, "use_ssl": True},
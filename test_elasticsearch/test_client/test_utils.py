@@ -18,9 +18,23 @@
 
 from __future__ import unicode_literals
 
+import gc
+import inspect
+import traceback
+import weakref
+
 import pytest
 
-from elasticsearch.client.utils import _bulk_body, _escape, _make_path, query_params
+from elasticsearch import Elasticsearch
+from elasticsearch.client.utils import (
+    AddonClient,
+    _bulk_body,
+    _cached_auth_header,
+    _escape,
+    _make_path,
+    query_params,
+)
+from elasticsearch.serializer import JSONSerializer
 
 
 class TestQueryParams:
@@ -69,6 +83,86 @@ class TestQueryParams:
         self.func_to_wrap(headers={"X": "y"})
         assert self.calls[-1] == ((), {"params": {}, "headers": {"x": "y"}})
 
+    def test_handles_ignore_request_timeout_and_none_values(self):
+        self.func_to_wrap(
+            "a", simple_param=None, pretty=True, ignore=404, request_timeout=1
+        )
+        assert self.calls[-1] == (
+            ("a",),
+            {
+                "params": {"pretty": b"true", "ignore": 404, "request_timeout": 1},
+                "headers": {},
+            },
+        )
+
+    def test_handles_many_params(self):
+        self.func_to_wrap(
+            simple_param="1",
+            pretty=True,
+            human=False,
+            error_trace=None,
+            format="json",
+            filter_path=["a", "b"],
+            other="x",
+        )
+        assert self.calls[-1] == (
+            (),
+            {
+                "params": {
+                    "simple_param": b"1",
+                    "pretty": b"true",
+                    "human": b"false",
+                    "format": b"json",
+                    "filter_path": b"a,b",
+                },
+                "headers": {},
+                "other": "x",
+            },
+        )
+
+    def test_params_follow_declaration_order(self):
+        self.func_to_wrap(filter_path="a", pretty=True, simple_param="1")
+        assert ["simple_param", "pretty", "filter_path"] == list(
+            self.calls[-1][1]["params"]
+        )
+
+        self.func_to_wrap(
+            filter_path="a", format="json", human=True, pretty=True, simple_param="1"
+        )
+        assert ["simple_param", "pretty", "human", "format", "filter_path"] == list(
+            self.calls[-1][1]["params"]
+        )
+
+    def test_wrapper_preserves_metadata(self):
+        def api_method(self, index, params=None, headers=None):
+            """API method docstring."""
+
+        wrapped = query_params("simple_param")(api_method)
+        assert wrapped is not api_method
+        assert wrapped.__wrapped__ is api_method
+        assert wrapped.__name__ == "api_method"
+        assert wrapped.__qualname__ == api_method.__qualname__
+        assert wrapped.__doc__ == "API method docstring."
+        assert inspect.signature(wrapped) == inspect.signature(api_method)
+
+    def test_traceback_shows_generated_source(self):
+        with pytest.raises(ValueError) as e:
+            self.func_to_wrap(http_auth="key", api_key=("1", "2"))
+        frame = traceback.extract_tb(e.value.__traceback__)[-1]
+        assert "_QUERY_PARAMS_TEMPLATE" in frame.filename
+        assert frame.line == "raise ValueError("
+
+    def test_only_plaintext_credentials_are_cached(self):
+        _cached_auth_header.cache_clear()
+        self.func_to_wrap(http_auth="abcdef")
+        assert _cached_auth_header.cache_info().currsize == 0
+
+        self.func_to_wrap(http_auth=["user", "password"])
+        assert _cached_auth_header.cache_info().currsize == 1
+
+        _cached_auth_header.cache_clear()
+        assert _cached_auth_header.cache_info().currsize == 0
+
     def test_per_call_authentication(self):
         self.func_to_wrap(api_key=("name", "key"))
         assert self.calls[-1] == (
@@ -117,6 +211,14 @@ class TestMakePath:
             "some-index", "type", id
         )
 
+    def test_skips_empty_parts_and_keeps_safe_characters(self):
+        assert "/a,b/_doc/logs-*/with%20space" == _make_path(
+            ["a", "b"], None, "", "_doc", [], "logs-*", "with space"
+        )
+
+    def test_handles_other_values(self):
+        assert "/idx/0/%7B%27a%27%3A%201%7D" == _make_path("idx", 0, b"", (), {"a": 1})
+
 
 class TestEscape:
     def test_handles_ascii(self):
@@ -131,6 +233,16 @@ class TestEscape:
         string = b"celery-task-meta-c4f1201f-eb7b-41d5-9318-a75a8cfbdaa0"
         assert string == _escape(string)
 
+    def test_handles_numbers_and_bools(self):
+        assert b"42" == _escape(42)
+        assert b"1.5" == _escape(1.5)
+        assert b"true" == _escape(True)
+        assert b"false" == _escape(False)
+
+    def test_handles_sequences(self):
+        assert b"a,b" == _escape(["a", "b"])
+        assert b"a,b" == _escape(("a", "b"))
+
 
 class TestBulkBody:
     def test_proper_bulk_body_as_string_is_not_modified(self):
@@ -153,3 +265,36 @@ class TestBulkBody:
             b'"{"index":{ "_index" : "test"}}\n{"field1": "value1"}"\n'
             == _bulk_body(None, bytestring_body)
         )
+
+    def test_bulk_body_as_list_is_serialized_with_newlines(self):
+        body = [{"index": {"_index": "test"}}, {"field1": "中文"}]
+        assert (
+            b'{"index":{"_index":"test"}}\n{"field1":"\xe4\xb8\xad\xe6\x96\x87"}\n'
+            == _bulk_body(JSONSerializer(), body)
+        )
+
+    def test_empty_bulk_body_as_list_is_a_newline(self):
+        assert b"\n" == _bulk_body(JSONSerializer(), [])
+
+    def test_bulk_body_as_list_keeps_existing_trailing_newline(self):
+        assert b"{}\n" == _bulk_body(JSONSerializer(), ["{}\n"])
+        assert b"{}\n\n{}\n" == _bulk_body(JSONSerializer(), ["{}\n", "{}"])
+
+
+class TestAddonClient:
+    class Addon(AddonClient):
+        namespace = "addon"
+
+    def test_infect_client_shares_transport_without_cycle(self):
+        client = self.Addon.infect_client(Elasticsearch())
+        assert client.addon.transport is client.transport
+        assert isinstance(client.addon.client, weakref.ProxyType)
+
+        # the transport is looked up through the client, not snapshotted
+        client.transport = transport = Elasticsearch().transport
+        assert client.addon.transport is transport
+
+        ref = weakref.ref(client)
+        del client
+        gc.collect()
+        assert ref() is None
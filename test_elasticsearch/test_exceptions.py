@@ -15,7 +15,7 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
-from elasticsearch.exceptions import TransportError
+from elasticsearch.exceptions import ConnectionError, TransportError
 
 
 class TestTransformError:
@@ -37,3 +37,24 @@ class TestTransformError:
             str(e)
             == "TransportError(500, 'InternalServerError', 'something error message')"
         )
+
+    def test_transform_error_parse_without_root_cause(self):
+        e = TransportError(500, "InternalServerError", {"error": {"root_cause": []}})
+
+        assert str(e) == "TransportError(500, 'InternalServerError')"
+
+    def test_transform_error_with_unparsable_info(self):
+        e = TransportError(404, "NotFound", "the error text")
+
+        assert str(e) == "TransportError(404, 'NotFound')"
+        assert str(e) is str(e)
+
+    def test_transform_error_without_info(self):
+        e = TransportError("N/A", "msg")
+
+        assert str(e) == "TransportError(N/A, 'msg')"
+
+    def test_connection_error_str(self):
+        e = ConnectionError("N/A", "abandon ship", ValueError("oops"))
+
+        assert str(e) == "ConnectionError(abandon ship) caused by: ValueError(oops)"
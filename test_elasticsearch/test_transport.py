@@ -21,6 +21,7 @@ from __future__ import unicode_literals
 import json
 import re
 import time
+from types import MappingProxyType
 
 import pytest
 from mock import patch
@@ -35,17 +36,23 @@ from elasticsearch.exceptions import (
 )
 from elasticsearch.transport import Transport, get_host_info
 
+# response headers of a DummyConnection unless others are given
+DEFAULT_HEADERS = MappingProxyType({"X-elastic-product": "Elasticsearch"})
+
 
 class DummyConnection(Connection):
     def __init__(self, **kwargs):
         self.exception = kwargs.pop("exception", None)
         self.status, self.data = kwargs.pop("status", 200), kwargs.pop("data", "{}")
-        self.headers = kwargs.pop("headers", {"X-elastic-product": "Elasticsearch"})
-        self.calls = []
+        # Connection.__init__() writes into self.headers so always copy
+        self.headers = dict(kwargs.pop("headers", DEFAULT_HEADERS))
+        self.call_args = []
+        self.call_kwargs = []
         super(DummyConnection, self).__init__(**kwargs)
 
     def perform_request(self, *args, **kwargs):
-        self.calls.append((args, kwargs))
+        self.call_args.append(args)
+        self.call_kwargs.append(kwargs)
         if self.exception:
             raise self.exception
         return self.status, self.headers, self.data
@@ -102,6 +109,62 @@ CLUSTER_NODES_7x_PUBLISH_HOST = """{
 }"""
 
 
+META_HEADER_RE = re.compile(r"^es=[0-9.]+p?,py=[0-9.]+p?,t=[0-9.]+p?$")
+META_HEADER_WITH_DM_RE = re.compile(
+    r"^es=[0-9.]+p?,py=[0-9.]+p?,t=[0-9.]+p?,dm=1\.2\.3$"
+)
+
+# arguments DummyConnection.perform_request() gets for a plain 'GET /'
+GET_ROOT_ARGS = ("GET", "/", None, None)
+DEFAULT_REQUEST_KWARGS = {"timeout": None, "ignore": (), "headers": None}
+
+
+def failing_host():
+    """Host whose connection always fails. The exception is created per call
+    as every raise adds to its traceback, which would keep earlier tests'
+    frames alive if it was shared.
+    """
+    return {"exception": ConnectionError("abandon ship")}
+
+
+# host of the node described by CLUSTER_NODES
+CLUSTER_NODES_HOST = "http://1.1.1.1:123"
+
+# parsed once for the tests comparing against a deserialized response
+CLUSTER_NODES_PARSED = json.loads(CLUSTER_NODES)
+
+
+@pytest.fixture(scope="module")
+def _module_transport():
+    return Transport([{}], meta_header=False, connection_class=DummyConnection)
+
+
+@pytest.fixture
+def shared_transport(_module_transport):
+    """Transport shared by the tests which don't modify it, only the calls
+    recorded by its connection are reset after each test.
+    """
+    yield _module_transport
+    connection = _module_transport.get_connection()
+    del connection.call_args[:]
+    del connection.call_kwargs[:]
+
+
+@pytest.fixture
+def transport_factory():
+    """Builds a single connection Transport responding with the given headers
+    or raising the given exception.
+    """
+
+    def _make(headers=None, exception=None):
+        host = {"headers": headers or {}}
+        if exception is not None:
+            host["exception"] = exception
+        return Transport([host], meta_header=False, connection_class=DummyConnection)
+
+    return _make
+
+
 class TestHostsInfoCallback:
     def test_master_only_nodes_are_ignored(self):
         nodes = [
@@ -126,17 +189,17 @@ class TestTransport:
         t = Transport([{"host": "localhost"}])
         assert isinstance(t.connection_pool, DummyConnectionPool)
 
-    def test_request_timeout_extracted_from_params_and_passed(self):
-        t = Transport([{}], meta_header=False, connection_class=DummyConnection)
+    def test_request_timeout_extracted_from_params_and_passed(self, shared_transport):
+        t = shared_transport
 
         t.perform_request("GET", "/", params={"request_timeout": 42})
-        assert 1 == len(t.get_connection().calls)
-        assert ("GET", "/", {}, None) == t.get_connection().calls[0][0]
+        assert 1 == len(t.get_connection().call_args)
+        assert ("GET", "/", {}, None) == t.get_connection().call_args[0]
         assert {
             "timeout": 42,
             "ignore": (),
             "headers": None,
-        } == t.get_connection().calls[0][1]
+        } == t.get_connection().call_kwargs[0]
 
     def test_opaque_id(self):
         t = Transport(
@@ -144,58 +207,52 @@ class TestTransport:
         )
 
         t.perform_request("GET", "/")
-        assert 1 == len(t.get_connection().calls)
-        assert ("GET", "/", None, None) == t.get_connection().calls[0][0]
-        assert {
-            "timeout": None,
-            "ignore": (),
-            "headers": None,
-        } == t.get_connection().calls[0][1]
+        assert 1 == len(t.get_connection().call_args)
+        assert GET_ROOT_ARGS == t.get_connection().call_args[0]
+        assert DEFAULT_REQUEST_KWARGS == t.get_connection().call_kwargs[0]
 
         # Now try with an 'x-opaque-id' set on perform_request().
         t.perform_request("GET", "/", headers={"x-opaque-id": "request-1"})
-        assert 2 == len(t.get_connection().calls)
-        assert ("GET", "/", None, None) == t.get_connection().calls[1][0]
+        assert 2 == len(t.get_connection().call_args)
+        assert GET_ROOT_ARGS == t.get_connection().call_args[1]
         assert {
             "timeout": None,
             "ignore": (),
             "headers": {"x-opaque-id": "request-1"},
-        } == t.get_connection().calls[1][1]
+        } == t.get_connection().call_kwargs[1]
 
-    def test_request_with_custom_user_agent_header(self):
-        t = Transport([{}], meta_header=False, connection_class=DummyConnection)
+    def test_request_with_custom_user_agent_header(self, shared_transport):
+        t = shared_transport
 
         t.perform_request("GET", "/", headers={"user-agent": "my-custom-value/1.2.3"})
-        assert 1 == len(t.get_connection().calls)
+        assert 1 == len(t.get_connection().call_args)
         assert {
             "timeout": None,
             "ignore": (),
             "headers": {"user-agent": "my-custom-value/1.2.3"},
-        } == t.get_connection().calls[0][1]
+        } == t.get_connection().call_kwargs[0]
 
     def test_send_get_body_as_source(self):
         t = Transport([{}], send_get_body_as="source", connection_class=DummyConnection)
 
         t.perform_request("GET", "/", body={})
-        assert 1 == len(t.get_connection().calls)
-        assert ("GET", "/", {"source": "{}"}, None) == t.get_connection().calls[0][0]
+        assert 1 == len(t.get_connection().call_args)
+        assert ("GET", "/", {"source": "{}"}, None) == t.get_connection().call_args[0]
 
     def test_send_get_body_as_post(self):
         t = Transport([{}], send_get_body_as="POST", connection_class=DummyConnection)
 
         t.perform_request("GET", "/", body={})
-        assert 1 == len(t.get_connection().calls)
-        assert ("POST", "/", None, b"{}") == t.get_connection().calls[0][0]
+        assert 1 == len(t.get_connection().call_args)
+        assert ("POST", "/", None, b"{}") == t.get_connection().call_args[0]
 
     def test_client_meta_header(self):
         t = Transport([{}], connection_class=DummyConnection)
 
         t.perform_request("GET", "/", body={})
-        assert 1 == len(t.get_connection().calls)
-        headers = t.get_connection().calls[0][1]["headers"]
-        assert re.search(
-            r"^es=[0-9.]+p?,py=[0-9.]+p?,t=[0-9.]+p?$", headers["x-elastic-client-meta"]
-        )
+        assert 1 == len(t.get_connection().call_args)
+        headers = t.get_connection().call_kwargs[0]["headers"]
+        assert META_HEADER_RE.match(headers["x-elastic-client-meta"])
 
         class DummyConnectionWithMeta(DummyConnection):
             HTTP_CLIENT_META = ("dm", "1.2.3")
@@ -203,20 +260,17 @@ class TestTransport:
         t = Transport([{}], connection_class=DummyConnectionWithMeta)
 
         t.perform_request("GET", "/", body={}, headers={"Custom": "header"})
-        assert 1 == len(t.get_connection().calls)
-        headers = t.get_connection().calls[0][1]["headers"]
-        assert re.search(
-            r"^es=[0-9.]+p?,py=[0-9.]+p?,t=[0-9.]+p?,dm=1.2.3$",
-            headers["x-elastic-client-meta"],
-        )
+        assert 1 == len(t.get_connection().call_args)
+        headers = t.get_connection().call_kwargs[0]["headers"]
+        assert META_HEADER_WITH_DM_RE.match(headers["x-elastic-client-meta"])
         assert headers["Custom"] == "header"
 
     def test_client_meta_header_not_sent(self):
         t = Transport([{}], meta_header=False, connection_class=DummyConnection)
 
         t.perform_request("GET", "/", body={})
-        assert 1 == len(t.get_connection().calls)
-        headers = t.get_connection().calls[0][1]["headers"]
+        assert 1 == len(t.get_connection().call_args)
+        headers = t.get_connection().call_kwargs[0]["headers"]
         assert headers is None
 
     def test_meta_header_type_error(self):
@@ -224,37 +278,23 @@ class TestTransport:
             Transport([{}], meta_header=1)
         assert str(e.value) == "meta_header must be of type bool"
 
-    def test_body_gets_encoded_into_bytes(self):
-        t = Transport([{}], connection_class=DummyConnection)
-
-        t.perform_request("GET", "/", body="你好")
-        assert 1 == len(t.get_connection().calls)
-        assert (
-            "GET",
-            "/",
-            None,
-            b"\xe4\xbd\xa0\xe5\xa5\xbd",
-        ) == t.get_connection().calls[0][0]
-
-    def test_body_bytes_get_passed_untouched(self):
-        t = Transport([{}], connection_class=DummyConnection)
+    @pytest.mark.parametrize(
+        "body, expected",
+        [
+            # str bodies get encoded into bytes
+            ("你好", b"\xe4\xbd\xa0\xe5\xa5\xbd"),
+            # bytes bodies get passed untouched
+            (b"\xe4\xbd\xa0\xe5\xa5\xbd", b"\xe4\xbd\xa0\xe5\xa5\xbd"),
+            # surrogates are encoded too
+            ("你好\uda6a", b"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa"),
+        ],
+    )
+    def test_body_encoding(self, shared_transport, body, expected):
+        t = shared_transport
 
-        body = b"\xe4\xbd\xa0\xe5\xa5\xbd"
         t.perform_request("GET", "/", body=body)
-        assert 1 == len(t.get_connection().calls)
-        assert ("GET", "/", None, body) == t.get_connection().calls[0][0]
-
-    def test_body_surrogates_replaced_encoded_into_bytes(self):
-        t = Transport([{}], connection_class=DummyConnection)
-
-        t.perform_request("GET", "/", body="你好\uda6a")
-        assert 1 == len(t.get_connection().calls)
-        assert (
-            "GET",
-            "/",
-            None,
-            b"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa",
-        ) == t.get_connection().calls[0][0]
+        assert 1 == len(t.get_connection().call_args)
+        assert ("GET", "/", None, expected) == t.get_connection().call_args[0]
 
     def test_kwargs_passed_on_to_connections(self):
         t = Transport([{"host": "google.com"}], port=123)
@@ -284,17 +324,17 @@ class TestTransport:
 
     def test_request_will_fail_after_X_retries(self):
         t = Transport(
-            [{"exception": ConnectionError("abandon ship")}],
+            [failing_host()],
             connection_class=DummyConnection,
         )
 
         with pytest.raises(ConnectionError):
             t.perform_request("GET", "/")
-        assert 4 == len(t.get_connection().calls)
+        assert 4 == len(t.get_connection().call_args)
 
     def test_failed_connection_will_be_marked_as_dead(self):
         t = Transport(
-            [{"exception": ConnectionError("abandon ship")}] * 2,
+            [failing_host()] * 2,
             connection_class=DummyConnection,
         )
 
@@ -320,7 +360,7 @@ class TestTransport:
 
         t.sniff_hosts()
         assert 1 == len(t.connection_pool.connections)
-        assert "http://1.1.1.1:123" == t.get_connection().host
+        assert CLUSTER_NODES_HOST == t.get_connection().host
 
     def test_sniff_on_start_fetches_and_uses_nodes_list(self):
         t = Transport(
@@ -329,7 +369,7 @@ class TestTransport:
             sniff_on_start=True,
         )
         assert 1 == len(t.connection_pool.connections)
-        assert "http://1.1.1.1:123" == t.get_connection().host
+        assert CLUSTER_NODES_HOST == t.get_connection().host
 
     def test_sniff_on_start_ignores_sniff_timeout(self):
         t = Transport(
@@ -338,9 +378,9 @@ class TestTransport:
             sniff_on_start=True,
             sniff_timeout=12,
         )
-        assert (("GET", "/_nodes/_all/http"), {"timeout": None}) == t.seed_connections[
-            0
-        ].calls[0]
+        connection = t.seed_connections[0]
+        assert ("GET", "/_nodes/_all/http") == connection.call_args[0]
+        assert {"timeout": None} == connection.call_kwargs[0]
 
     def test_sniff_uses_sniff_timeout(self):
         t = Transport(
@@ -349,9 +389,9 @@ class TestTransport:
             sniff_timeout=42,
         )
         t.sniff_hosts()
-        assert (("GET", "/_nodes/_all/http"), {"timeout": 42}) == t.seed_connections[
-            0
-        ].calls[0]
+        connection = t.seed_connections[0]
+        assert ("GET", "/_nodes/_all/http") == connection.call_args[0]
+        assert {"timeout": 42} == connection.call_kwargs[0]
 
     def test_sniff_reuses_connection_instances_if_possible(self):
         t = Transport(
@@ -367,7 +407,7 @@ class TestTransport:
 
     def test_sniff_on_fail_triggers_sniffing_on_fail(self):
         t = Transport(
-            [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
+            [failing_host(), {"data": CLUSTER_NODES}],
             connection_class=DummyConnection,
             sniff_on_connection_fail=True,
             max_retries=0,
@@ -377,13 +417,13 @@ class TestTransport:
         with pytest.raises(ConnectionError):
             t.perform_request("GET", "/")
         assert 1 == len(t.connection_pool.connections)
-        assert "http://1.1.1.1:123" == t.get_connection().host
+        assert CLUSTER_NODES_HOST == t.get_connection().host
 
     @patch("elasticsearch.transport.Transport.sniff_hosts")
     def test_sniff_on_fail_failing_does_not_prevent_retires(self, sniff_hosts):
         sniff_hosts.side_effect = [TransportError("sniff failed")]
         t = Transport(
-            [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
+            [failing_host(), {"data": CLUSTER_NODES}],
             connection_class=DummyConnection,
             sniff_on_connection_fail=True,
             max_retries=3,
@@ -392,28 +432,31 @@ class TestTransport:
 
         conn_err, conn_data = t.connection_pool.connections
         response = t.perform_request("GET", "/")
-        assert json.loads(CLUSTER_NODES) == response
+        assert CLUSTER_NODES_PARSED == response
         assert 1 == sniff_hosts.call_count
-        assert 1 == len(conn_err.calls)
-        assert 1 == len(conn_data.calls)
+        assert 1 == len(conn_err.call_args)
+        assert 1 == len(conn_data.call_args)
 
-    def test_sniff_after_n_seconds(self):
+    def test_sniff_after_n_seconds(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
         t = Transport(
             [{"data": CLUSTER_NODES}],
             connection_class=DummyConnection,
             sniffer_timeout=5,
         )
 
-        for _ in range(4):
-            t.perform_request("GET", "/")
+        now[0] += 4
+        t.perform_request("GET", "/")
         assert 1 == len(t.connection_pool.connections)
         assert isinstance(t.get_connection(), DummyConnection)
-        t.last_sniff = time.time() - 5.1
+        assert 1000.0 == t.last_sniff
 
+        now[0] += 1.1
         t.perform_request("GET", "/")
         assert 1 == len(t.connection_pool.connections)
-        assert "http://1.1.1.1:123" == t.get_connection().host
-        assert time.time() - 1 < t.last_sniff < time.time() + 0.01
+        assert CLUSTER_NODES_HOST == t.get_connection().host
+        assert now[0] == t.last_sniff
 
     def test_sniff_7x_publish_host(self):
         # Test the response shaped when a 7.x node has publish_host set
@@ -444,10 +487,8 @@ class TestTransport:
 
 
 @pytest.mark.parametrize("headers", [{}, {"X-elastic-product": "BAD HEADER"}])
-def test_unsupported_product_error(headers):
-    t = Transport(
-        [{"headers": headers}], meta_header=False, connection_class=DummyConnection
-    )
+def test_unsupported_product_error(transport_factory, headers):
+    t = transport_factory(headers=headers)
 
     with pytest.raises(UnsupportedProductError) as e:
         t.perform_request("GET", "/")
@@ -456,27 +497,23 @@ def test_unsupported_product_error(headers):
         "and we do not support this unknown product"
     )
 
-    calls = t.get_connection().calls
-    assert len(calls) == 1
-    assert calls[0][0] == ("GET", "/", None, None)
-    assert calls[0][1] == {"timeout": None, "ignore": (), "headers": None}
+    connection = t.get_connection()
+    assert len(connection.call_args) == 1
+    assert connection.call_args[0] == GET_ROOT_ARGS
+    assert connection.call_kwargs[0] == DEFAULT_REQUEST_KWARGS
 
 
 @pytest.mark.parametrize(
     "error", [TransportError(500, "", {}), NotFoundError(404, "", {})]
 )
-def test_transport_error_raised_before_product_error(error):
-    t = Transport(
-        [{"headers": {"X-elastic-product": "BAD HEADER"}, "exception": error}],
-        meta_header=False,
-        connection_class=DummyConnection,
-    )
+def test_transport_error_raised_before_product_error(transport_factory, error):
+    t = transport_factory(headers={"X-elastic-product": "BAD HEADER"}, exception=error)
 
     with pytest.raises(TransportError) as e:
         t.perform_request("GET", "/")
     assert e.value.status_code == error.status_code
 
-    calls = t.get_connection().calls
-    assert len(calls) == 1
-    assert calls[0][0] == ("GET", "/", None, None)
-    assert calls[0][1] == {"timeout": None, "ignore": (), "headers": None}
+    connection = t.get_connection()
+    assert len(connection.call_args) == 1
+    assert connection.call_args[0] == GET_ROOT_ARGS
+    assert connection.call_kwargs[0] == DEFAULT_REQUEST_KWARGS